@@ -13,6 +13,7 @@ pbpaste>> snippets.html && echo -e "\n\n< snippet separator -->\n\n" >> snippets
 rename snippets.html to something more appropriate like cary_fall2024_intermediate50women.html
 
 Activate the virtual environment with: source mypickleballenv/bin/activate
+Requires the lxml parser in the virtual environment: pip install lxml
 Run with: ./create_match_data.py snippets.html (or whatever file name it was renamed to)
 
 Look for match_data_snippets.csv (or similar to whatever file name it was renamed to) to use as input to other rank and synergy scripts.
@@ -25,27 +26,54 @@ from datetime import datetime
 import re
 import argparse
 import os
+from collections import defaultdict
+from multiprocessing import Pool
+
+
+_WS_RE = re.compile(r'\s+')
+_DIGIT_RE = re.compile(r'\d+')
+_NONDIGIT_RE = re.compile(r'\D')
+# Zero-width spaces and non-breaking spaces, deleted via str.translate
+_INVISIBLE_SPACES = str.maketrans('', '', '\u200B\u00A0')
+# Tag text filters for soup.find; BeautifulSoup calls .search() on each candidate string
+_MATCH_NUMBER_RE = re.compile(r'Match Number')
+# Match dates look like "Sat, July 12, 2025"
+_MATCH_DATE_RE = re.compile(
+    r'^\s*(Mon|Tue|Wed|Thu|Fri|Sat|Sun)[a-z]*,\s+'
+    r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},\s+\d{4}'
+)
+
+# Output CSV columns; parse_match returns each game as a tuple in this order
+FIELDNAMES = [
+    "match_id", "game_id", "match_date", "team1_name", "team2_name",
+    "partner1", "partner2", "opponent1", "opponent2",
+    "team1_points", "team2_points"
+]
+
+# Below this many snippets, starting worker processes costs more than parsing sequentially
+PARALLEL_MIN_SNIPPETS = 50
 
 
 def clean_name(name):
     # Replace any whitespace (including unusual Unicode spaces) with a single space
     # \s matches all Unicode whitespace characters
-    name = re.sub(r'\s+', ' ', name)  # collapse any whitespace sequence to a single space
+    name = _WS_RE.sub(' ', name)  # collapse any whitespace sequence to a single space
     # Remove zero-width spaces and non-breaking spaces explicitly
-    name = name.replace('\u200B', '').replace('\u00A0', '')
+    name = name.translate(_INVISIBLE_SPACES)
     return name.strip()
 
 
 def parse_match(html):
-    soup = BeautifulSoup(html, "html.parser")
+    # lxml is much faster than html.parser and wraps snippet fragments in <html><body> itself
+    soup = BeautifulSoup(html, "lxml")
     
     # match_id
-    match_id_tag = soup.find("h1", string=lambda x: x and "Match Number" in x)
+    match_id_tag = soup.find("h1", string=_MATCH_NUMBER_RE)
     match_id = match_id_tag.text.split(":")[1].strip() if match_id_tag else ""
     
     # match_date
-    date_tag = soup.find("h4", string=lambda x: x and "," in x and any(month in x for month in 
-                    ["Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec"]))
+    # Only a handful of h4 tags per snippet: test the date regex on their text directly
+    date_tag = next((h4 for h4 in soup.find_all("h4") if h4.string and _MATCH_DATE_RE.search(h4.string)), None)
     date_str = date_tag.text.strip() if date_tag else ""
     match_date = ""
     if date_str:
@@ -84,7 +112,7 @@ def parse_match(html):
         if len(cells) == 4:
             game_id_text = cells[0].text.strip()
             # Try to extract numeric game ID (e.g. "Game 3" → 3)
-            match_game_id = re.search(r'\d+', game_id_text)
+            match_game_id = _DIGIT_RE.search(game_id_text)
             if not match_game_id:
                 continue
             game_id = int(match_game_id.group())
@@ -98,31 +126,30 @@ def parse_match(html):
             if "-" in score_text:
                 score_part = score_text.split("\n")[0].strip()
                 team1_points, team2_points = [s.strip() for s in score_part.split("-")]
-                team2_points = re.sub(r"\D", "", team2_points)  # keep digits only
+                team2_points = _NONDIGIT_RE.sub("", team2_points)  # keep digits only
             else:
                 team1_points = team2_points = ""
             
             p1, p2 = (team1_players + ["", ""])[:2]
             o1, o2 = (team2_players + ["", ""])[:2]
             
-            games.append({
-                "match_id": match_id,
-                "game_id": game_id,
-                "match_date": match_date,
-                "team1_name": team1_name,
-                "team2_name": team2_name,
-                "partner1": p1,
-                "partner2": p2,
-                "opponent1": o1,
-                "opponent2": o2,
-                "team1_points": team1_points,
-                "team2_points": team2_points
-            })
+            games.append((
+                match_id, game_id, match_date, team1_name, team2_name,
+                p1, p2, o1, o2,
+                team1_points, team2_points
+            ))
             game_id += 1
     
     return games
 
 
+def write_games(writer, games_per_snippet, match_counts):
+    # Every game parsed from one snippet shares that snippet's match_id
+    for games in games_per_snippet:
+        if games:
+            writer.writerows(games)
+            match_counts[games[0][0]] += len(games)
+
 
 def main():
     parser = argparse.ArgumentParser(description="Parse match HTML and output CSV.")
@@ -144,22 +171,30 @@ def main():
     with open(input_file, "r", encoding="utf-8") as f:
         content = f.read()
 
-    snippets = content.split("< snippet separator -->")
-
-    all_games = []
-    for snippet in snippets:
-        snippet = snippet.strip()
-        if snippet:
-            games = parse_match(snippet)
-            all_games.extend(games)
-
-    # 🔍 REPORTING SECTION STARTS HERE
-    from collections import defaultdict
+    snippets = [snippet.strip() for snippet in content.split("< snippet separator -->")]
+    snippets = [snippet for snippet in snippets if snippet]
 
+    # Games are written as each snippet is parsed, counting games per match in the same pass
+    # Written to a temp file first so a parse error leaves any existing output file untouched
     match_counts = defaultdict(int)
-    for game in all_games:
-        match_counts[game["match_id"]] += 1
+    temp_file = output_file + ".tmp"
+    try:
+        with open(temp_file, "w", newline="", encoding="utf-8", buffering=1 << 20) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(FIELDNAMES)
+
+            # Snippets are independent, so large files are parsed across all CPU cores
+            if len(snippets) < PARALLEL_MIN_SNIPPETS:
+                write_games(writer, map(parse_match, snippets), match_counts)
+            else:
+                with Pool() as pool:
+                    write_games(writer, pool.imap(parse_match, snippets), match_counts)
+    except BaseException:
+        os.remove(temp_file)
+        raise
+    os.replace(temp_file, output_file)
 
+    # 🔍 REPORTING SECTION STARTS HERE
     total_matches = len(match_counts)
     print(f"\n🔢 Total unique matches: {total_matches}")
 
@@ -169,17 +204,7 @@ def main():
 
     # ✅ END REPORTING
 
-    with open(output_file, "w", newline="", encoding="utf-8") as csvfile:
-        fieldnames = [
-            "match_id", "game_id", "match_date", "team1_name", "team2_name",
-            "partner1", "partner2", "opponent1", "opponent2",
-            "team1_points", "team2_points"
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(all_games)
-
-    print(f"\n✅ Extracted {len(all_games)} games into {output_file}")
+    print(f"\n✅ Extracted {sum(match_counts.values())} games into {output_file}")
 
 
 
@@ -3,12 +3,15 @@
 """
 To run this script:
 Activate the virtual environment with: source mypickleballenv/bin/activate
-Run with: ./rank_ptp.py match_data_x.csv
+Run with: ./rank_ptp.py ratings_x.csv match_data_x.csv
+Add --verbose to print the rating calculation for every match, or --log details.txt to write it to a file
 
 """
 
 import csv
 import argparse
+import sys
+from array import array
 
 BASE_RATING_DELTA = 0.0035  # Scales up or down all RATING_CHANGE numbers to add/subtract more for each win/loss
 
@@ -49,124 +52,181 @@ RATING_CHANGE = {
     ('favored', 'heavy', 'blowout'): 7,   
 }
 
+# RATING_CHANGE flattened into a tuple indexed by integer codes, so each match does
+# one tuple index instead of building and hashing a 3-tuple of strings.
+# Index = context * 9 + favoredness * 3 + margin, codes being positions in these tuples.
+CONTEXTS = ('tossup', 'favored', 'underdog')
+FAVOREDNESS_LEVELS = (None, 'slight', 'heavy')
+RESULT_MARGINS = ('narrow', 'solid', 'blowout')
+TOSSUP, FAVORED, UNDERDOG = range(3)
+NOT_FAVORED, SLIGHT, HEAVY = range(3)
+NARROW, SOLID, BLOWOUT = range(3)
+
+RATING_CHANGE_TABLE = tuple(
+    RATING_CHANGE.get((context, level, margin), 10)
+    for context in CONTEXTS
+    for level in FAVOREDNESS_LEVELS
+    for margin in RESULT_MARGINS
+)
+
+DEFAULT_RATING = 3.5  # Starting rating for players missing from the ratings file
+
 # Load initial ratings from CSV
 def load_ratings(filename):
-    ratings = {}
     with open(filename, newline='') as f:
         reader = csv.reader(f)
         next(reader)  # Skip header
-        for row in reader:
-            player, rating = row
-            ratings[player] = float(rating)
-    return ratings
-
-# Apply rating updates based on a match
-def update_ratings(ratings, row):
-    p1 = row['partner1'].strip()
-    p2 = row['partner2'].strip()
-    o1 = row['opponent1'].strip()
-    o2 = row['opponent2'].strip()
-
-    if "DEFAULT" in [p1, p2, o1, o2]:
-        print("Skipping match due to DEFAULT player:", row)
-        return
-
-    s1 = int(row['team1_points'])
-    s2 = int(row['team2_points'])
-    default_rating = 3.5
-
-    # Get current ratings or use default
-    r1 = ratings.get(p1, default_rating)
-    r2 = ratings.get(p2, default_rating)
-    r3 = ratings.get(o1, default_rating)
-    r4 = ratings.get(o2, default_rating)
+        return {sys.intern(player): float(rating) for player, rating in reader}
 
+# Rating math for one match on plain numbers, kept free of dicts, strings and I/O
+# Returns the four new ratings plus a tuple of the intermediate values, for logging
+def rate_match(r1, r2, r3, r4, s1, s2):
     team1_rating = (r1 + r2) / 2
     team2_rating = (r3 + r4) / 2
 
     team1_won = s1 > s2
     rating_diff = abs(team1_rating - team2_rating)
 
-    print(f"\nMatch: {p1}/{p2} ({s1}) vs {o1}/{o2} ({s2})")
-    print(f"{p1}/{p2} avg rating: {team1_rating:.2f}, {o1}/{o2} avg rating: {team2_rating:.2f}")
-    print(f"Score: {s1}-{s2} → {'Winners: ' + p1 + '/' + p2 if team1_won else 'Winners: ' + o1 + '/' + o2}")
-    print(f"Rating difference: {rating_diff:.2f}")
-
     if rating_diff < TOSSUP_THRESHOLD:
-        winner_context = 'tossup'
-        favoredness_level = None
-        print("Match context: Toss-up")
+        winner_context = TOSSUP
+        favoredness_level = NOT_FAVORED
     else:
-        favored_team = 'team1' if team1_rating > team2_rating else 'team2'
-        favoredness_level = 'slight' if rating_diff < SLIGHT_THRESHOLD else 'heavy'
-        winner_context = (
-            'favored' if (team1_won and favored_team == 'team1') or (not team1_won and favored_team == 'team2')
-            else 'underdog'
-        )
-        favored_players = f"{p1}/{p2}" if favored_team == 'team1' else f"{o1}/{o2}"
-        print(f"Favored team: {favored_players}")
-        print(f"Favored level: {favoredness_level}")
-        print(f"Winning team type: {winner_context}")
+        team1_favored = team1_rating > team2_rating
+        favoredness_level = SLIGHT if rating_diff < SLIGHT_THRESHOLD else HEAVY
+        winner_context = FAVORED if team1_won == team1_favored else UNDERDOG
 
     margin = abs(s1 - s2)
     if margin >= BLOWOUT_MARGIN:
-        result_margin = 'blowout'
+        result_margin = BLOWOUT
     elif margin >= NARROW_MARGIN:
-        result_margin = 'solid'
+        result_margin = SOLID
     else:
-        result_margin = 'narrow'
+        result_margin = NARROW
 
-    key = (winner_context, favoredness_level, result_margin)
-    rating_change_multiplier = RATING_CHANGE.get(key, 10)
+    rating_change_multiplier = RATING_CHANGE_TABLE[winner_context * 9 + favoredness_level * 3 + result_margin]
     change = BASE_RATING_DELTA * rating_change_multiplier
     delta = change / 2
 
-    print(f"Result margin: {result_margin}")
-    print(f"Rating change multiplier: {rating_change_multiplier}, Change per player: {delta:.3f}")
-
+    details = (team1_rating, team2_rating, rating_diff,
+               winner_context, favoredness_level, result_margin, rating_change_multiplier, delta)
     if team1_won:
-        ratings[p1] = r1 + delta + WINNING_BONUS
-        ratings[p2] = r2 + delta + WINNING_BONUS
-        ratings[o1] = r3 - delta
-        ratings[o2] = r4 - delta
+        return (r1 + delta + WINNING_BONUS, r2 + delta + WINNING_BONUS, r3 - delta, r4 - delta, details)
+    return (r1 - delta, r2 - delta, r3 + delta + WINNING_BONUS, r4 + delta + WINNING_BONUS, details)
+
+# Apply rating updates based on a match
+# ratings is an array('d') indexed by the ids in player_ids (name -> id)
+# Per-match details are only written when a log file handle is given; formatting them dominates the runtime otherwise
+def update_ratings(ratings, player_ids, p1, p2, o1, o2, s1, s2, log=None):
+    if p1 == "DEFAULT" or p2 == "DEFAULT" or o1 == "DEFAULT" or o2 == "DEFAULT":
+        if log is not None:
+            print(f"Skipping match due to DEFAULT player: {p1}/{p2} ({s1}) vs {o1}/{o2} ({s2})", file=log)
+        return
+
+    s1 = int(s1)
+    s2 = int(s2)
+
+    # Get current ratings, adding new players at the default rating
+    i1 = get_player_id(ratings, player_ids, p1)
+    i2 = get_player_id(ratings, player_ids, p2)
+    i3 = get_player_id(ratings, player_ids, o1)
+    i4 = get_player_id(ratings, player_ids, o2)
+    r1, r2, r3, r4 = ratings[i1], ratings[i2], ratings[i3], ratings[i4]
+
+    ratings[i1], ratings[i2], ratings[i3], ratings[i4], details = rate_match(r1, r2, r3, r4, s1, s2)
+
+    if log is not None:
+        log_match(log, p1, p2, o1, o2, s1, s2, (r1, r2, r3, r4),
+                  (ratings[i1], ratings[i2], ratings[i3], ratings[i4]), details)
+
+# Return a player's index into ratings, appending the default rating for a new player
+def get_player_id(ratings, player_ids, name):
+    player_id = player_ids.get(name)
+    if player_id is None:
+        player_id = player_ids[name] = len(ratings)
+        ratings.append(DEFAULT_RATING)
+    return player_id
+
+# Write the details of one rating update
+# details is the tuple of intermediate values returned by rate_match
+def log_match(log, p1, p2, o1, o2, s1, s2, old_ratings, new_ratings, details):
+    r1, r2, r3, r4 = old_ratings
+    n1, n2, n3, n4 = new_ratings
+    (team1_rating, team2_rating, rating_diff,
+     winner_context, favoredness_level, result_margin, rating_change_multiplier, delta) = details
+    team1_won = s1 > s2
+
+    print(f"\nMatch: {p1}/{p2} ({s1}) vs {o1}/{o2} ({s2})", file=log)
+    print(f"{p1}/{p2} avg rating: {team1_rating:.2f}, {o1}/{o2} avg rating: {team2_rating:.2f}", file=log)
+    print(f"Score: {s1}-{s2} → {'Winners: ' + p1 + '/' + p2 if team1_won else 'Winners: ' + o1 + '/' + o2}", file=log)
+    print(f"Rating difference: {rating_diff:.2f}", file=log)
+
+    if winner_context == TOSSUP:
+        print("Match context: Toss-up", file=log)
     else:
-        ratings[p1] = r1 - delta
-        ratings[p2] = r2 - delta
-        ratings[o1] = r3 + delta + WINNING_BONUS
-        ratings[o2] = r4 + delta + WINNING_BONUS
+        favored_players = f"{p1}/{p2}" if team1_rating > team2_rating else f"{o1}/{o2}"
+        print(f"Favored team: {favored_players}", file=log)
+        print(f"Favored level: {FAVOREDNESS_LEVELS[favoredness_level]}", file=log)
+        print(f"Winning team type: {CONTEXTS[winner_context]}", file=log)
+
+    print(f"Result margin: {RESULT_MARGINS[result_margin]}", file=log)
+    print(f"Rating change multiplier: {rating_change_multiplier}, Change per player: {delta:.3f}", file=log)
 
-    print(f"Updated ratings:")
-    print(f"  {p1}: {r1:.3f} → {ratings[p1]:.3f}")
-    print(f"  {p2}: {r2:.3f} → {ratings[p2]:.3f}")
-    print(f"  {o1}: {r3:.3f} → {ratings[o1]:.3f}")
-    print(f"  {o2}: {r4:.3f} → {ratings[o2]:.3f}")
+    print(f"Updated ratings:", file=log)
+    print(f"  {p1}: {r1:.3f} → {n1:.3f}", file=log)
+    print(f"  {p2}: {r2:.3f} → {n2:.3f}", file=log)
+    print(f"  {o1}: {r3:.3f} → {n3:.3f}", file=log)
+    print(f"  {o2}: {r4:.3f} → {n4:.3f}", file=log)
 
 
 # Process all matches in file
-def process_matches(ratings_file, matches_file):
-    ratings = load_ratings(ratings_file)
+def process_matches(ratings_file, matches_file, log=None):
+    initial_ratings = load_ratings(ratings_file)
+    # Ratings are kept in a contiguous array indexed by player id while processing matches
+    player_ids = {player: i for i, player in enumerate(initial_ratings)}
+    ratings = array('d', initial_ratings.values())
 
     with open(matches_file, newline='') as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        # Column positions from the header row
+        header = next(reader)
+        idx = {name: i for i, name in enumerate(header)}
+        P1, P2, O1, O2 = idx['partner1'], idx['partner2'], idx['opponent1'], idx['opponent2']
+        S1, S2 = idx['team1_points'], idx['team2_points']
+
         for row in reader:
-            update_ratings(ratings, row)
+            if not row:
+                continue  # blank line
+            # Intern player names
+            update_ratings(ratings, player_ids,
+                           sys.intern(row[P1].strip()), sys.intern(row[P2].strip()),
+                           sys.intern(row[O1].strip()), sys.intern(row[O2].strip()),
+                           row[S1], row[S2], log)
 
-    return ratings
+    return dict(zip(player_ids, ratings))
 
 # Print final ratings sorted highest to lowest
+# Built as one string and written once rather than one print call per player
 def print_ratings(ratings):
-    print("\nFinal Player Ratings:")
-    for player, rating in sorted(ratings.items(), key=lambda x: -x[1]):
-        print(f"{player},{rating:.2f}")
+    lines = ["\nFinal Player Ratings:"]
+    lines.extend(f"{player},{rating:.2f}" for player, rating in sorted(ratings.items(), key=lambda x: -x[1]))
+    sys.stdout.write("\n".join(lines) + "\n")
 
 # Main block
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Process rating updates from match data.")
     parser.add_argument("ratings_file", help="Input CSV file with initial ratings")
     parser.add_argument("matches_file", help="CSV file with match results")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("--verbose", action="store_true", help="Print the rating calculation for every match")
+    verbosity.add_argument("--log", metavar="LOG_FILE", help="Write the rating calculation for every match to LOG_FILE")
 
     args = parser.parse_args()
 
-    final_ratings = process_matches(args.ratings_file, args.matches_file)
+    if args.log:
+        # Large buffer so the per-match details are flushed in big chunks, not line by line
+        with open(args.log, "w", encoding="utf-8", buffering=1 << 20) as log:
+            final_ratings = process_matches(args.ratings_file, args.matches_file, log)
+    else:
+        final_ratings = process_matches(args.ratings_file, args.matches_file, sys.stdout if args.verbose else None)
     print_ratings(final_ratings)
 
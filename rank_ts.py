@@ -10,8 +10,8 @@ This script is faster, but less accurate
 
 import csv
 import argparse
+import sys
 import trueskill
-from collections import defaultdict
 
 
 # Set up TrueSkill environment with no draws
@@ -19,12 +19,31 @@ from collections import defaultdict
 # sigma=15.0 so that players are not penalized by fewer games, their initial uncertainty is high, so it can vary quickly
 # tau=0.0 so there is no skill drift, so inactive players are not penalized over time
 ts = trueskill.TrueSkill(draw_probability=0.0, sigma=8.333, tau=0.0) 
-player_ratings = defaultdict(ts.Rating)
+
+# Starting rating for every new player; ts.rate returns new Rating objects, so one shared prior is safe
+DEFAULT_RATING = ts.Rating()
+
+# Ratings live in a list indexed by player id so each game does list indexing instead of dict hashing
+player_ids = {}       # name -> index into player_names/player_ratings
+player_names = []
+player_ratings = []
 
 # store which team the player plays on, assumes one team in the input data
 player_teams = {}
 
+def get_player_id(name):
+    """
+    Return the id for a player name, giving first-seen players a fresh rating.
+    """
+    player_id = player_ids.get(name)
+    if player_id is None:
+        player_id = player_ids[name] = len(player_names)
+        player_names.append(name)
+        player_ratings.append(DEFAULT_RATING)
+    return player_id
+
 def update_ratings(p1, p2, o1, o2, team1_score, team2_score):
+    # p1, p2, o1, o2 are player ids from get_player_id()
     # Get current ratings for players on team 1
     current_rating_team1 = [player_ratings[p1], player_ratings[p2]]
     # Get current ratings for players on team 2
@@ -49,19 +68,30 @@ def main():
     input_file = args.csv_file
 
     with open(input_file, newline='') as csvfile:
-        reader = csv.DictReader(csvfile)
+        reader = csv.reader(csvfile)
+        # Column positions from the header row
+        header = next(reader)
+        idx = {name: i for i, name in enumerate(header)}
+        P1, P2, O1, O2 = idx['partner1'], idx['partner2'], idx['opponent1'], idx['opponent2']
+        T1, T2 = idx['team1_name'], idx['team2_name']
+        S1, S2 = idx['team1_points'], idx['team2_points']
+
         for row in reader:
-            p1 = row['partner1'].strip()
-            p2 = row['partner2'].strip()
-            o1 = row['opponent1'].strip()
-            o2 = row['opponent2'].strip()
+            if not row:
+                continue  # blank line
+
+            # Intern player names
+            p1 = sys.intern(row[P1].strip())
+            p2 = sys.intern(row[P2].strip())
+            o1 = sys.intern(row[O1].strip())
+            o2 = sys.intern(row[O2].strip())
 
             # Skip any games that were defaulted
-            if 'DEFAULT' in [p1, p2, o1, o2]:
+            if p1 == 'DEFAULT' or p2 == 'DEFAULT' or o1 == 'DEFAULT' or o2 == 'DEFAULT':
                 continue
 
-            team1_name = row['team1_name'].strip()
-            team2_name = row['team2_name'].strip()
+            team1_name = row[T1].strip()
+            team2_name = row[T2].strip()
 
             # Set team names only if not already set (first occurrence wins)
             for player in [p1, p2]:
@@ -72,15 +102,16 @@ def main():
                     player_teams[player] = team2_name
 
             try:
-                team1_score = int(row['team1_points'])
-                team2_score = int(row['team2_points'])
-            except (KeyError, ValueError):
+                team1_score = int(row[S1])
+                team2_score = int(row[S2])
+            except ValueError:
                 continue  # skip bad rows, like extra header rows
 
-            update_ratings(p1, p2, o1, o2, team1_score, team2_score)
+            update_ratings(get_player_id(p1), get_player_id(p2), get_player_id(o1), get_player_id(o2),
+                           team1_score, team2_score)
 
     # Sort players by their skill estimate (exposed rating) in descending order
-    ranked_players = sorted(player_ratings.items(), key=lambda x: x[1].mu, reverse=True)
+    ranked_players = sorted(zip(player_names, player_ratings), key=lambda x: x[1].mu, reverse=True)
 
     # Print CSV header
     print("Rank,Player,Team,Skill,Mu,Sigma")
@@ -9,28 +9,40 @@ This script is slower, but more accurate
 """
 
 import csv
+import sys
 from datetime import datetime
 from collections import defaultdict
+from operator import itemgetter
 from trueskillthroughtime import History, Player, Gaussian
 
 def parse_csv_for_ttt(csv_path):
-    compositions = []
-    results = []
-    match_dates = []
+    games = []  # (match_date, p1, p2, o1, o2, team1_won)
     players = set()
     player_teams = defaultdict(set)
 
     with open(csv_path, newline='') as csvfile:
-        reader = csv.DictReader(csvfile)
+        reader = csv.reader(csvfile)
+        # Column positions from the header row
+        header = next(reader)
+        idx = {name: i for i, name in enumerate(header)}
+        P1, P2, O1, O2 = idx['partner1'], idx['partner2'], idx['opponent1'], idx['opponent2']
+        T1, T2 = idx['team1_name'], idx['team2_name']
+        S1, S2 = idx['team1_points'], idx['team2_points']
+        DATE = idx['match_date']
+
         for row in reader:
-            p1, p2 = row['partner1'].strip(), row['partner2'].strip()
-            o1, o2 = row['opponent1'].strip(), row['opponent2'].strip()
+            if not row:
+                continue  # blank line
+
+            # Intern player names
+            p1, p2 = sys.intern(row[P1].strip()), sys.intern(row[P2].strip())
+            o1, o2 = sys.intern(row[O1].strip()), sys.intern(row[O2].strip())
 
-            if 'DEFAULT' in [p1, p2, o1, o2]:
+            if p1 == 'DEFAULT' or p2 == 'DEFAULT' or o1 == 'DEFAULT' or o2 == 'DEFAULT':
                 continue
 
-            team1_name = row['team1_name'].strip()
-            team2_name = row['team2_name'].strip()
+            team1_name = row[T1].strip()
+            team2_name = row[T2].strip()
 
             # Assign team names for each player
             for p in [p1, p2]:
@@ -39,8 +51,8 @@ def parse_csv_for_ttt(csv_path):
                 player_teams[o].add(team2_name)
 
             try:
-                team1_points = int(row['team1_points'])
-                team2_points = int(row['team2_points'])
+                team1_points = int(row[S1])
+                team2_points = int(row[S2])
             except ValueError:
                 continue  # skip invalid scores
 
@@ -48,21 +60,20 @@ def parse_csv_for_ttt(csv_path):
             if team1_points + team2_points == 0:
                 continue
 
-            compositions.append([[p1, p2], [o1, o2]])
-            results.append([1, 0] if team1_points > team2_points else [0, 1])
-
             try:
-                match_date = datetime.strptime(row['match_date'].strip(), "%Y-%m-%d")
+                # match_date is ISO (YYYY-MM-DD), so the C fromisoformat parser can be used instead of strptime
+                match_date = datetime.fromisoformat(row[DATE].strip())
             except ValueError:
-                raise ValueError(f"Invalid date format: {row['match_date']}")
-            match_dates.append(match_date)
+                raise ValueError(f"Invalid date format: {row[DATE]}")
+
+            games.append((match_date, p1, p2, o1, o2, team1_points > team2_points))
 
             players.update([p1, p2, o1, o2])
 
-    # Sort all lists by match_date
-    sorted_indices = sorted(range(len(match_dates)), key=lambda i: match_dates[i])
-    compositions = [compositions[i] for i in sorted_indices]
-    results = [results[i] for i in sorted_indices]
+    # Sort games by match_date (stable, so same-day games keep file order)
+    games.sort(key=itemgetter(0))
+    compositions = [[[p1, p2], [o1, o2]] for _, p1, p2, o1, o2, _ in games]
+    results = [[1, 0] if team1_won else [0, 1] for *_, team1_won in games]
     times = list(range(len(compositions)))
 
     return compositions, results, times, sorted(players), player_teams
@@ -115,7 +126,6 @@ def main(csv_file):
         print(f"{i},{p},{team_str},{skill:.2f},{r.mu:.2f},{r.sigma:.2f}")
 
 if __name__ == "__main__":
-    import sys
     if len(sys.argv) != 2:
         print("Usage: python ttt_ratings.py match_data.csv")
         sys.exit(1)
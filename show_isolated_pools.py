@@ -8,36 +8,76 @@ Run with: ./show_isolated_pools.py match_data_x.csv
 """
 
 import csv
-from collections import defaultdict
-import networkx as nx
+import sys
 
 def find_player_pools(csv_file):
-    G = nx.Graph()
+    # Union-find over integer player ids: parent[i] is i for the root of each pool
+    player_ids = {}  # name -> id
+    names = []
+    parent = []
+    size = []
+
+    def player_id(name):
+        i = player_ids.get(name)
+        if i is None:
+            i = player_ids[name] = len(names)
+            names.append(name)
+            parent.append(i)
+            size.append(1)
+        return i
+
+    def find(i):
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        # Path compression: point everything on the way straight at the root
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    def union(a, b):
+        a, b = find(a), find(b)
+        if a == b:
+            return
+        # Union by size: hang the smaller tree under the larger one
+        if size[a] < size[b]:
+            a, b = b, a
+        parent[b] = a
+        size[a] += size[b]
 
     with open(csv_file, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        # Column positions from the header row
+        header = next(reader)
+        idx = {name: i for i, name in enumerate(header)}
+        P1, P2, O1, O2 = idx['partner1'], idx['partner2'], idx['opponent1'], idx['opponent2']
+
         for row in reader:
-            p1 = row['partner1'].strip()
-            p2 = row['partner2'].strip()
-            o1 = row['opponent1'].strip()
-            o2 = row['opponent2'].strip()
+            if not row:
+                continue  # blank line
+
+            # Intern player names
+            p1 = sys.intern(row[P1].strip())
+            p2 = sys.intern(row[P2].strip())
+            o1 = sys.intern(row[O1].strip())
+            o2 = sys.intern(row[O2].strip())
 
-            if 'DEFAULT' in [p1, p2, o1, o2]:
+            if p1 == 'DEFAULT' or p2 == 'DEFAULT' or o1 == 'DEFAULT' or o2 == 'DEFAULT':
                 continue
 
-            # Add edges for teammates
-            G.add_edge(p1, p2)
-            G.add_edge(o1, o2)
+            i1, i2, j1, j2 = player_id(p1), player_id(p2), player_id(o1), player_id(o2)
 
-            # Add edges for opponents
-            G.add_edge(p1, o1)
-            G.add_edge(p1, o2)
-            G.add_edge(p2, o1)
-            G.add_edge(p2, o2)
+            # Join teammates, then the two teams; the other opponent pairs are
+            # already connected through these three, so they add nothing to the pools
+            union(i1, i2)
+            union(j1, j2)
+            union(i1, j1)
 
-    # Now find connected components (disjoint pools)
-    components = list(nx.connected_components(G))
-    return components
+    # Now group players by root to get the connected components (disjoint pools)
+    pools = {}
+    for i, name in enumerate(names):
+        pools.setdefault(find(i), set()).add(name)
+    return list(pools.values())
 
 def main(csv_file):
     pools = find_player_pools(csv_file)
@@ -49,7 +89,6 @@ def main(csv_file):
         print()
 
 if __name__ == "__main__":
-    import sys
     if len(sys.argv) != 2:
         print("Usage: python find_pools.py match_data.csv")
         sys.exit(1)
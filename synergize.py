@@ -4,83 +4,134 @@
 To run this script:
 Activate the virtual environment with: source mypickleballenv/bin/activate
 Run with: ./synergize.py match_data_x.csv
+Requires numpy in the virtual environment: pip install numpy
 
 """
 
 import csv
-from collections import defaultdict
-import statistics
+import math
+import sys
+from array import array
+from operator import itemgetter
 import argparse
+from typing import NamedTuple
+import numpy as np
 from trueskillthroughtime import History, Player, Gaussian
 
 # Histories for each player
 player_objs = {}  # name -> Player()
+player_ids = {}  # name -> integer id; the TTT History is keyed by these ids instead of name strings
 
 # Partnership stats: store wins/losses and match history
-partnership_stats = defaultdict(lambda: {'wins': 0, 'losses': 0, 'matches': []})
+# Match history is kept as parallel typed arrays (one entry per match) rather than a dict per match
+partnership_stats = {}
 player_to_team = {}
 
-# To build History, store compositions: [ [winner_team, loser_team], ... ]
+# To build History, store compositions of player ids: [ [winner_team, loser_team], ... ]
 compositions = []
 
+class SynergyRow(NamedTuple):
+    """
+    One partnership's line in the synergy output.
+    """
+    partnership: str
+    player1: str
+    player2: str
+    team_name: str
+    synergy_score: float
+    win_rate: float
+    matches_played: int
+    avg_score_diff: float
+    individual_strength: float
+
+# 10 ** (x / 10) == exp(x * ln(10) / 10); exp is a cheaper ufunc than a general power
+LN10_OVER_10 = math.log(10) / 10
+
+def new_partnership_stats():
+    """
+    Empty stats for a partnership's first match.
+    Per-match columns are unboxed C arrays: won flags as bytes, score diffs as 16-bit ints.
+    """
+    return {'wins': 0, 'losses': 0,
+            'won': array('B'), 'score_diff': array('h'), 'opp1_id': array('i'), 'opp2_id': array('i')}
+
 def record_partnership(p_team, o_team, team_won, score_diff):
     """
     Track partnership performance (win/loss, score diff, opponents).
+    p_team must already be a name-ordered tuple; it is used as the partnership key.
+    Opponents are stored as player ids, ready for indexing the mu array in compute_synergy.
     """
-    key = tuple(sorted(p_team))
-    partnership_stats[key]['matches'].append({
-        'won': team_won,
-        'score_diff': score_diff,
-        'opponents': tuple(sorted(o_team))
-    })
+    stats = partnership_stats.get(p_team)
+    if stats is None:
+        stats = partnership_stats[p_team] = new_partnership_stats()
+    opp1, opp2 = o_team
+    stats['won'].append(team_won)
+    stats['score_diff'].append(score_diff)
+    stats['opp1_id'].append(player_ids[opp1])
+    stats['opp2_id'].append(player_ids[opp2])
     if team_won:
-        partnership_stats[key]['wins'] += 1
+        stats['wins'] += 1
     else:
-        partnership_stats[key]['losses'] += 1
+        stats['losses'] += 1
 
 def build_players(*names):
     """
-    Ensure each player name has a Player() object.
+    Ensure each player name has a Player() object and an integer id.
     """
     for name in names:
         if name not in player_objs:
             player_objs[name] = Player()
+            player_ids[name] = len(player_ids)
 
 def parse_csv(input_file):
     with open(input_file, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-
-        for idx, row in enumerate(reader):
-            p1 = row['partner1'].strip()
-            p2 = row['partner2'].strip()
-            o1 = row['opponent1'].strip()
-            o2 = row['opponent2'].strip()
-            if 'DEFAULT' in (p1, p2, o1, o2):
+        reader = csv.reader(f)
+        # Column positions from the header row, fetched together with one itemgetter
+        header = next(reader)
+        columns = {name: i for i, name in enumerate(header)}
+        get_fields = itemgetter(*(columns[name] for name in (
+            'partner1', 'partner2', 'opponent1', 'opponent2',
+            'team1_name', 'team2_name', 'team1_points', 'team2_points')))
+
+        # Blank lines are dropped before numbering, as DictReader did
+        for idx, row in enumerate(row for row in reader if row):
+            p1, p2, o1, o2, team1_name, team2_name, points1, points2 = get_fields(row)
+            # Intern player names
+            p1 = sys.intern(p1.strip())
+            p2 = sys.intern(p2.strip())
+            o1 = sys.intern(o1.strip())
+            o2 = sys.intern(o2.strip())
+            if p1 == 'DEFAULT' or p2 == 'DEFAULT' or o1 == 'DEFAULT' or o2 == 'DEFAULT':
                 continue
 
             # Skip rows where points are not integers (extra headers in concatenated files)
             try:
-                score1 = int(row['team1_points'])
-                score2 = int(row['team2_points'])
+                score1 = int(points1)
+                score2 = int(points2)
             except ValueError:
-                print(f"Skipping invalid row {idx}: {row}")
+                print(f"Skipping invalid row {idx}: {dict(zip(header, row))}")
                 continue
 
-            win_team = [p1, p2] if score1 > score2 else [o1, o2]
-            lose_team = [o1, o2] if score1 > score2 else [p1, p2]
+            # Order each team by name once here; record_partnership uses these tuples as keys as-is
+            team1 = (p1, p2) if p1 <= p2 else (p2, p1)
+            team2 = (o1, o2) if o1 <= o2 else (o2, o1)
+            win_team, lose_team = (team1, team2) if score1 > score2 else (team2, team1)
             team_won = score1 > score2
             score_diff = abs(score1 - score2)
 
             build_players(p1, p2, o1, o2)
 
             # Track team-to-player association (assumes consistent naming)
-            player_to_team[p1] = row['team1_name'].strip()
-            player_to_team[p2] = row['team1_name'].strip()
-            player_to_team[o1] = row['team2_name'].strip()
-            player_to_team[o2] = row['team2_name'].strip()
+            team1_name = team1_name.strip()
+            team2_name = team2_name.strip()
+            player_to_team[p1] = team1_name
+            player_to_team[p2] = team1_name
+            player_to_team[o1] = team2_name
+            player_to_team[o2] = team2_name
 
             # Record for the TTT History
-            compositions.append([win_team, lose_team])
+            compositions.append([[player_ids[win_team[0]], player_ids[win_team[1]]],
+                                 [player_ids[lose_team[0]], player_ids[lose_team[1]]]])
 
             # Record partnership stats for both teams
             record_partnership(win_team, lose_team, True, score_diff)
@@ -89,44 +140,63 @@ def parse_csv(input_file):
 def compute_synergy(curves):
     """
     For each partnership, compute synergy metrics using latest player mus.
+    curves is keyed by player id, as the History was built from player ids.
     """
     results = []
-    # Latest skill (mu) for each player
-    latest_mu = {name: curves[name][-1][1].mu for name in curves}
-
-    for (p1, p2), stats in partnership_stats.items():
-        if len(stats['matches']) < 2:
-            continue
-
-        indiv_strength = latest_mu[p1] + latest_mu[p2]
-
-        total_perf = 0
-        for m in stats['matches']:
-            team_strength = latest_mu[p1] + latest_mu[p2]
-            opp1, opp2 = m['opponents']
-            opp_strength = latest_mu[opp1] + latest_mu[opp2]
-            expected = 1 / (1 + 10 ** ((opp_strength - team_strength) / 10))
-            actual = 1 if m['won'] else 0
-            total_perf += (actual - expected)
-
-        avg_perf = total_perf / len(stats['matches'])
+    # Latest skill (mu) for each player, as an array indexed by player id
+    mu = np.empty(len(player_ids))
+    for player_id, curve in curves.items():
+        mu[player_id] = curve[-1][1].mu
+
+    partnerships = [(key, stats) for key, stats in partnership_stats.items() if len(stats['won']) >= 2]
+
+    # A partnership's own strength is the same for all its matches: compute it once per pair
+    id_of = player_ids.__getitem__
+    pair_strength = (mu[np.array([id_of(p1) for (p1, _), _ in partnerships], dtype=np.intp)] +
+                     mu[np.array([id_of(p2) for (_, p2), _ in partnerships], dtype=np.intp)])
+
+    # Concatenate every partnership's match columns, tagged with the partnership's index.
+    # Typed arrays extend by memory copy and hand their buffers to NumPy without boxing each value.
+    part_id, o1_idx, o2_idx, won, score_diff = array('i'), array('i'), array('i'), array('B'), array('h')
+    for i, (_, stats) in enumerate(partnerships):
+        part_id.extend(array('i', [i]) * len(stats['won']))
+        o1_idx.extend(stats['opp1_id'])
+        o2_idx.extend(stats['opp2_id'])
+        won.extend(stats['won'])
+        score_diff.extend(stats['score_diff'])
+
+    part_id = np.asarray(part_id)
+    team_strength = pair_strength[part_id]
+    opp_strength = mu[np.asarray(o1_idx)] + mu[np.asarray(o2_idx)]
+    expected = 1 / (1 + np.exp(LN10_OVER_10 * (opp_strength - team_strength)))
+    perf = np.asarray(won) - expected
+
+    # Per-partnership sums in one C pass each
+    n = len(partnerships)
+    matches_played = np.bincount(part_id, minlength=n)
+    avg_perf = np.bincount(part_id, weights=perf, minlength=n) / matches_played
+    avg_diff = np.bincount(part_id, weights=np.asarray(score_diff), minlength=n) / matches_played
+
+    synergy_score = avg_perf * 100
+
+    # Rank on the score array; a stable sort keeps equal scores in first-seen order
+    for i in np.argsort(-synergy_score, kind='stable').tolist():
+        (p1, p2), stats = partnerships[i]
         win_rate = stats['wins'] / (stats['wins'] + stats['losses'])
-        avg_diff = statistics.mean(m['score_diff'] for m in stats['matches'])
         team_name = player_to_team.get(p1, "")
 
-        results.append({
-            'partnership': f"{p1} + {p2}",
-            'player1': p1,
-            'player2': p2,
-            'team_name': team_name,
-            'synergy_score': avg_perf * 100,
-            'win_rate': win_rate,
-            'matches_played': len(stats['matches']),
-            'avg_score_diff': avg_diff,
-            'individual_strength': indiv_strength
-        })
-
-    results.sort(key=lambda x: x['synergy_score'], reverse=True)
+        results.append(SynergyRow(
+            partnership=f"{p1} + {p2}",
+            player1=p1,
+            player2=p2,
+            team_name=team_name,
+            synergy_score=float(synergy_score[i]),
+            win_rate=win_rate,
+            matches_played=int(matches_played[i]),
+            avg_score_diff=float(avg_diff[i]),
+            individual_strength=float(pair_strength[i])
+        ))
+
     return results
 
 def main():
@@ -144,12 +214,15 @@ def main():
 
     synergies = compute_synergy(curves)
 
-    # Output CSV
-    print("Rank,Partnership,Player1,Player2,Team,Synergy_Score,Win_Rate,Games,Individual_Strength")
-    for rank, d in enumerate(synergies, 1):
-        print(f"{rank},\"{d['partnership']}\",{d['player1']},{d['player2']},{d['team_name']},"
-              f"{d['synergy_score']:.2f},{d['win_rate']:.2f},"
-              f"{d['matches_played']},{d['individual_strength']:.2f}")
+    # Output CSV, built as one string and written once rather than one print call per partnership
+    lines = ["Rank,Partnership,Player1,Player2,Team,Synergy_Score,Win_Rate,Games,Individual_Strength"]
+    lines.extend(
+        f"{rank},\"{d.partnership}\",{d.player1},{d.player2},{d.team_name},"
+        f"{d.synergy_score:.2f},{d.win_rate:.2f},"
+        f"{d.matches_played},{d.individual_strength:.2f}"
+        for rank, d in enumerate(synergies, 1)
+    )
+    sys.stdout.write("\n".join(lines) + "\n")
 
 if __name__ == '__main__':
     main()